@@ -1,10 +1,18 @@
 import re
+import json
+import bisect
+import httpx
 import openai
 from csv_processor import csv_processor
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Tuple
 from datetime import date
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,9 +21,112 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fallback keyword -> intent, in priority order. Greetings are single words, matched against
+# the query's word set rather than as substrings; everything else is a substring match
+_WORD_RE = re.compile(r'\w+')
+_KEYWORD_TO_INTENT = {
+    'notional': 'notional_query', 'traded amount': 'notional_query', 'total value': 'notional_query',
+    'volume': 'volume_query', 'shares traded': 'volume_query', 'quantity': 'volume_query',
+    'price': 'price_query', 'how much': 'price_query', 'cost': 'price_query',
+    'market': 'market_query', 'korea': 'market_query', 'china': 'market_query', 'japan': 'market_query',
+    'summary': 'summary_query', 'overview': 'summary_query', 'all markets': 'summary_query',
+    'hello': 'greeting', 'hi': 'greeting', 'hey': 'greeting',
+    'help': 'help', 'what can you do': 'help'
+}
+
+# Stock code patterns for the regex fallback, tried in order so a specific shape always wins
+# over the general word.suffix one; the boundaries keep quotes, brackets and punctuation out
+# of the code and stop the specific shapes matching the tail of a longer ticker
+_MARKET_SUFFIXES = 'HK|KS|KQ|SS|SH|SZ|ZK|T|TO|AX|BK|TB|KL|NS|BO|SI|TW|TWO|JK|PS|HN|HP|US|NASDAQ|NYSE'
+_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    rf'(?<![\w-])(\d{{4,6}}\.(?:{_MARKET_SUFFIXES}))\b',
+    rf'(?<![\w-])([A-Z]{{1,5}}\.(?:{_MARKET_SUFFIXES}))\b',
+    r'\b([\w-]+\.[A-Z]{1,6})\b',
+]]
+
+# Processed queries kept in memory; repeated quick-query clicks skip the API entirely
+_RESPONSE_CACHE_SIZE = 128
+
+# Market name -> currency symbol used when formatting notionals
+_CURRENCY_MAP = {
+    'Hong Kong': 'HK$',
+    'Korea (KOSPI)': '₩', 'Korea (KOSDAQ)': '₩',
+    'China (Shanghai)': '¥', 'China (Shenzhen)': '¥',
+    'Japan (Tokyo)': '¥',
+    'Australia (ASX)': 'A$',
+    'Thailand (SET)': '฿',
+    'Malaysia (KLSE)': 'RM',
+    'India (NSE)': '₹', 'India (BSE)': '₹',
+    'Singapore (SGX)': 'S$',
+    'Taiwan': 'NT$',
+    'Indonesia (IDX)': 'Rp',
+    'Philippines (PSE)': '₱',
+    'Vietnam (HNX)': '₫', 'Vietnam (HOSE)': '₫',
+    'United States': '$', 'United States (NASDAQ)': '$', 'United States (NYSE)': '$'
+}
+
+# format_currency scales: amounts at or above each threshold use the next (divisor, suffix, format)
+_THRESHOLDS = (1_000, 1_000_000, 1_000_000_000)
+_CURRENCY_SCALES = ((1, '', ',.2f'), (1_000, 'K', '.1f'), (1_000_000, 'M', '.2f'), (1_000_000_000, 'B', '.2f'))
+
+# Query analysis only needs a short JSON (plus a brief draft for greetings/help), so it runs
+# on a small model with a terse prompt and a tight token cap
+_INTENT_MODEL = "gpt-4o-mini"
+_INTENT_PROMPT = ("Return JSON: intent (one of notional_query, volume_query, price_query, market_query, "
+                  "summary_query, date_query, greeting, help, general_query), stock_code (ticker or null), "
+                  "date_context (today, yesterday, specific_date, unspecified), market_focus (country or null), "
+                  "response_draft (a concise, professional reply if answering needs no trading data, else null).")
+_INTENT_MAX_TOKENS = 200
+
+# Intents answered from a single stock's trading data
+_STOCK_DATA_INTENTS = ('notional_query', 'volume_query', 'price_query')
+
+_UNAVAILABLE_RESPONSE = "I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
+
+# Client-side limits applied before requests leave the process, so bursts queue here instead of hitting 429s
+_MAX_CONCURRENT_REQUESTS = 5
+_REQUESTS_PER_MINUTE = 200
+
+# Transient OpenAI failures are retried with exponential backoff (1s, 2s, 4s) before
+# callers fall back to the keyword/regex path
+_RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError,
+                     openai.APIConnectionError, openai.InternalServerError)
+_MAX_ATTEMPTS = 4
+_BACKOFF_MIN_SECONDS = 1
+_BACKOFF_MAX_SECONDS = 16
+
+class _RequestLimiter:
+    """Bound in-flight OpenAI requests and pace them with a token bucket"""
+    
+    def __init__(self, max_concurrent: int, requests_per_minute: int):
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._rate = requests_per_minute / 60.0
+        self._capacity = float(max_concurrent)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+    
+    @contextmanager
+    def slot(self):
+        """Hold a concurrency slot, waiting first for this request's share of the rate budget"""
+        with self._slots:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                # Reserve a token even if it has not refilled yet; the debt is the wait
+                self._tokens -= 1
+                wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
 class AIModel:
     def __init__(self):
         self.csv_processor = csv_processor
+        self._response_cache = OrderedDict()
+        self._limiter = _RequestLimiter(_MAX_CONCURRENT_REQUESTS, _REQUESTS_PER_MINUTE)
+        self._lookup_pool = ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_REQUESTS)
         self.setup_openai()
         
     def setup_openai(self):
@@ -28,10 +139,18 @@ class AIModel:
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not found in environment variables")
             
-            # Initialize OpenAI client
+            # Initialize OpenAI client on a long-lived HTTP/2 pool so clicks reuse warm TLS connections
+            http_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+                timeout=httpx.Timeout(30.0, connect=5.0)
+            )
             self.client = openai.OpenAI(
                 api_key=api_key,
-                base_url=api_base if api_base else None
+                base_url=api_base if api_base else None,
+                http_client=http_client,
+                # Retries are handled by _retry_transient so they stay behind the rate limiter
+                max_retries=0
             )
             
             # Test the connection
@@ -41,25 +160,50 @@ class AIModel:
             logger.error(f"❌ Failed to initialize OpenAI client: {e}")
             raise
     
+    def _create_chat_completion(self, **kwargs):
+        """Send a chat completion through the client-side rate limiter"""
+        with self._limiter.slot():
+            return self._retry_transient(lambda: self.client.chat.completions.create(**kwargs))
+    
+    def _stream_chat_completion(self, **kwargs) -> Iterator[str]:
+        """Stream a chat completion's text deltas, holding a limiter slot until it finishes"""
+        with self._limiter.slot():
+            stream = self._retry_transient(lambda: self.client.chat.completions.create(stream=True, **kwargs))
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    def _retry_transient(self, send):
+        """Call send(), retrying rate-limit, timeout, connection and 5xx errors with exponential backoff"""
+        for attempt in range(_MAX_ATTEMPTS):
+            try:
+                return send()
+            except _RETRYABLE_ERRORS as e:
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                delay = min(_BACKOFF_MAX_SECONDS, _BACKOFF_MIN_SECONDS * 2 ** attempt)
+                logger.warning(f"OpenAI request failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+    
     def extract_stock_code(self, query: str) -> str:
         """Use OpenAI to extract stock code from natural language query"""
         try:
             system_prompt = """You are a financial data extraction assistant. Extract the stock code/ticker from the user's query. 
-            Return ONLY the stock code in the format like "005930.KS", "0148.HK", "600036.SS" etc. 
-            If no stock code is found, return 'None'."""
+            Return a JSON object {"stock_code": "005930.KS"} with the code in the format like "005930.KS", "0148.HK", "600036.SS" etc. 
+            If no stock code is found, return {"stock_code": null}."""
             
-            response = self.client.chat.completions.create(
+            response = self._create_chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": query}
                 ],
-                max_tokens=20,
+                response_format={ "type": "json_object" },
+                max_tokens=30,
                 temperature=0.1
             )
             
-            stock_code = response.choices[0].message.content.strip()
-            return stock_code if stock_code != 'None' else None
+            return json.loads(response.choices[0].message.content).get('stock_code')
             
         except Exception as e:
             logger.error(f"Error extracting stock code with OpenAI: {e}")
@@ -68,73 +212,46 @@ class AIModel:
     
     def _fallback_extract_stock_code(self, query: str) -> str:
         """Fallback method using regex if OpenAI fails"""
-        patterns = [
-            r'(\d{4,6}\.(?:HK|KS|KQ|SS|SH|SZ|ZK|T|TO|AX|BK|TB|KL|NS|BO|SI|TW|TWO|JK|PS|HN|HP|US|NASDAQ|NYSE))',
-            r'([A-Z]{1,5}\.(?:HK|KS|KQ|SS|SH|SZ|ZK|T|TO|AX|BK|TB|KL|NS|BO|SI|TW|TWO|JK|PS|HN|HP|US|NASDAQ|NYSE))',
-            r'stock\s+(\S+\.\S{2,6})',
-            r'for\s+(\S+\.\S{2,6})',
-            r'(\S+\.\S{2,6})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
+        for pattern in _PATTERNS:
+            for match in pattern.finditer(query):
                 potential_code = match.group(1)
                 if self.csv_processor.is_valid_stock_code(potential_code):
                     return potential_code
         return None
     
-    def classify_intent_with_openai(self, query: str) -> Dict[str, Any]:
-        """Use OpenAI to classify intent and extract entities"""
+    def _combined_analyze_and_respond(self, query: str) -> Dict[str, Any]:
+        """Use one OpenAI call to classify intent, extract entities and draft a reply"""
         try:
-            system_prompt = """You are a financial trading data analyst. Analyze the user's query and return a JSON with:
-            - intent: one of ['notional_query', 'volume_query', 'price_query', 'market_query', 'summary_query', 'date_query', 'greeting', 'help', 'general_query']
-            - stock_code: the stock ticker if mentioned (e.g., "005930.KS")
-            - date_context: one of ['today', 'yesterday', 'specific_date', 'unspecified']
-            - market_focus: if the query is about a specific market/country (e.g., "korea", "china")
-            
-            Be precise and focus on financial trading data queries."""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = self._create_chat_completion(
+                model=_INTENT_MODEL,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": _INTENT_PROMPT},
                     {"role": "user", "content": query}
                 ],
                 response_format={ "type": "json_object" },
-                max_tokens=150,
+                max_tokens=_INTENT_MAX_TOKENS,
                 temperature=0.1
             )
             
-            result = response.choices[0].message.content
-            return eval(result)  # Parse JSON response
+            return json.loads(response.choices[0].message.content)
             
         except Exception as e:
-            logger.error(f"Error classifying intent with OpenAI: {e}")
-            return self._fallback_classify_intent(query)
+            logger.error(f"Error analyzing query with OpenAI: {e}")
+            # Flagged so a reply built on this stand-in classification is not cached
+            return dict(self._fallback_classify_intent(query), degraded=True)
     
     def _fallback_classify_intent(self, query: str) -> Dict[str, Any]:
         """Fallback intent classification"""
         query_lower = query.lower()
+        words = set(_WORD_RE.findall(query_lower))
         
         # Simple keyword matching as fallback
-        if any(word in query_lower for word in ['notional', 'traded amount', 'total value']):
-            intent = 'notional_query'
-        elif any(word in query_lower for word in ['volume', 'shares traded', 'quantity']):
-            intent = 'volume_query'
-        elif any(word in query_lower for word in ['price', 'how much', 'cost']):
-            intent = 'price_query'
-        elif any(word in query_lower for word in ['market', 'korea', 'china', 'japan']):
-            intent = 'market_query'
-        elif any(word in query_lower for word in ['summary', 'overview', 'all markets']):
-            intent = 'summary_query'
-        elif any(word in query_lower for word in ['hello', 'hi', 'hey']):
-            intent = 'greeting'
-        elif any(word in query_lower for word in ['help', 'what can you do']):
-            intent = 'help'
+        for keyword, intent in _KEYWORD_TO_INTENT.items():
+            if keyword in (words if intent == 'greeting' else query_lower):
+                break
         else:
             intent = 'general_query'
-            
+        
         return {
             "intent": intent,
             "stock_code": None,
@@ -142,53 +259,84 @@ class AIModel:
             "market_focus": None
         }
     
+    def _response_messages(self, query: str, context_data: Dict[str, Any] = None) -> List[Dict[str, str]]:
+        """Build the chat messages for a reply grounded in the trading data context"""
+        # Prepare context for the AI
+        context_str = ""
+        if context_data and context_data.get('success'):
+            context_str = f"""
+            Trading Data Context:
+            - Stock: {context_data.get('stock_code', 'N/A')}
+            - Market: {context_data.get('market', 'N/A')}
+            - Date: {context_data.get('query_date', 'N/A')}
+            - Notional: {context_data.get('notional_amount', 0):,.2f}
+            - Quantity: {context_data.get('quantity', 0):,}
+            - Average Price: {context_data.get('average_price', 0):.2f}
+            - Trade Count: {context_data.get('trade_count', 0)}
+            """
+        
+        system_prompt = f"""You are a professional financial trading assistant specializing in international stock markets. 
+        You have access to trading execution data from CSV files.
+
+        GUIDELINES:
+        - Be precise, professional, and helpful
+        - Use appropriate currency symbols for different markets
+        - Format large numbers with commas (e.g., 1,000,000)
+        - If trading data is available, present it clearly
+        - If no data is found, suggest alternatives
+        - Keep responses concise but informative
+        - Use emojis sparingly for visual clarity
+
+        Available Data: {context_str if context_str else 'No specific trading data available for this query.'}
+        """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query}
+        ]
+    
     def generate_openai_response(self, query: str, context_data: Dict[str, Any] = None) -> str:
         """Generate intelligent response using OpenAI with trading data context"""
+        return self._generate_reply(query, context_data)[0]
+    
+    def _generate_reply(self, query: str, context_data: Dict[str, Any] = None) -> Tuple[str, bool]:
+        """Reply text and whether it came from OpenAI rather than the fallback"""
         try:
-            # Prepare context for the AI
-            context_str = ""
-            if context_data and context_data.get('success'):
-                context_str = f"""
-                Trading Data Context:
-                - Stock: {context_data.get('stock_code', 'N/A')}
-                - Market: {context_data.get('market', 'N/A')}
-                - Date: {context_data.get('query_date', 'N/A')}
-                - Notional: {context_data.get('notional_amount', 0):,.2f}
-                - Quantity: {context_data.get('quantity', 0):,}
-                - Average Price: {context_data.get('average_price', 0):.2f}
-                - Trade Count: {context_data.get('trade_count', 0)}
-                """
-            
-            system_prompt = f"""You are a professional financial trading assistant specializing in international stock markets. 
-            You have access to trading execution data from CSV files.
-
-            GUIDELINES:
-            - Be precise, professional, and helpful
-            - Use appropriate currency symbols for different markets
-            - Format large numbers with commas (e.g., 1,000,000)
-            - If trading data is available, present it clearly
-            - If no data is found, suggest alternatives
-            - Keep responses concise but informative
-            - Use emojis sparingly for visual clarity
-
-            Available Data: {context_str if context_str else 'No specific trading data available for this query.'}
-            """
-            
-            response = self.client.chat.completions.create(
+            response = self._create_chat_completion(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query}
-                ],
+                messages=self._response_messages(query, context_data),
                 max_tokens=500,
                 temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            return response.choices[0].message.content.strip(), True
             
         except Exception as e:
             logger.error(f"Error generating OpenAI response: {e}")
-            return self._generate_fallback_response(query, context_data)
+            return self._generate_fallback_response(query, context_data), False
+    
+    def generate_openai_response_stream(self, query: str, context_data: Dict[str, Any] = None) -> Iterator[str]:
+        """Stream the response text as OpenAI generates it, with the same fallback on failure"""
+        return self._stream_reply(query, context_data, {})
+    
+    def _stream_reply(self, query: str, context_data: Dict[str, Any], outcome: Dict[str, bool]) -> Iterator[str]:
+        """Stream the reply, setting outcome['complete'] only if OpenAI finished it without error"""
+        streamed = False
+        try:
+            for delta in self._stream_chat_completion(
+                model="gpt-3.5-turbo",
+                messages=self._response_messages(query, context_data),
+                max_tokens=500,
+                temperature=0.7
+            ):
+                streamed = True
+                yield delta
+            outcome['complete'] = True
+            
+        except Exception as e:
+            logger.error(f"Error streaming OpenAI response: {e}")
+            # Only substitute the fallback if the user has not already seen part of a reply
+            if not streamed:
+                yield self._generate_fallback_response(query, context_data)
     
     def _generate_fallback_response(self, query: str, context_data: Dict[str, Any] = None) -> str:
         """Generate fallback response when OpenAI fails"""
@@ -212,96 +360,168 @@ This is automated trading data from our execution records."""
     
     def format_currency(self, amount: float, currency: str = "HK$") -> str:
         """Format currency with proper formatting"""
-        if amount >= 1_000_000_000:
-            return f"{currency}{amount/1_000_000_000:.2f}B"
-        elif amount >= 1_000_000:
-            return f"{currency}{amount/1_000_000:.2f}M"
-        elif amount >= 1_000:
-            return f"{currency}{amount/1_000:.1f}K"
-        else:
-            return f"{currency}{amount:,.2f}"
+        divisor, suffix, spec = _CURRENCY_SCALES[bisect.bisect_right(_THRESHOLDS, amount)]
+        return f"{currency}{amount / divisor:{spec}}{suffix}"
     
     def get_currency_symbol(self, market: str) -> str:
         """Get appropriate currency symbol for different markets"""
-        currency_map = {
-            'Hong Kong': 'HK$',
-            'Korea (KOSPI)': '₩', 'Korea (KOSDAQ)': '₩',
-            'China (Shanghai)': '¥', 'China (Shenzhen)': '¥',
-            'Japan (Tokyo)': '¥',
-            'Australia (ASX)': 'A$',
-            'Thailand (SET)': '฿',
-            'Malaysia (KLSE)': 'RM',
-            'India (NSE)': '₹', 'India (BSE)': '₹',
-            'Singapore (SGX)': 'S$',
-            'Taiwan': 'NT$',
-            'Indonesia (IDX)': 'Rp',
-            'Philippines (PSE)': '₱',
-            'Vietnam (HNX)': '₫', 'Vietnam (HOSE)': '₫',
-            'United States': '$', 'United States (NASDAQ)': '$', 'United States (NYSE)': '$'
-        }
-        return currency_map.get(market, '$')
+        return _CURRENCY_MAP.get(market, '$')
     
     def process_query(self, query: str) -> Dict[str, Any]:
+        """Process user query using OpenAI AI, serving repeated queries from an LRU cache"""
+        cache_key = self._cache_key(query)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            self._response_cache.move_to_end(cache_key)
+            return dict(cached)
+        
+        result = self._process_query(query)
+        
+        # Cache only replies OpenAI actually produced; fallback and error replies come from a
+        # transient failure and would otherwise be served for the rest of the day
+        if result.get('ai_processed'):
+            self._remember(cache_key, result)
+        return dict(result)
+    
+    def process_query_streaming(self, query: str) -> Iterator[str]:
+        """Process user query like process_query, yielding the response text as it streams in"""
+        cache_key = self._cache_key(query)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            self._response_cache.move_to_end(cache_key)
+            yield cached['response']
+            return
+        
+        logger.info(f"Processing query with OpenAI (streaming): {query}")
+        try:
+            openai_analysis, stock_code, query_date, context_data = self._analyze_query(query)
+        except Exception as e:
+            logger.error(f"Error in OpenAI processing: {e}")
+            yield _UNAVAILABLE_RESPONSE
+            return
+        
+        response_draft = openai_analysis.get('response_draft')
+        if context_data is None and response_draft:
+            parts = [response_draft]
+            yield response_draft
+            complete = True
+        else:
+            parts = []
+            outcome = {}
+            for delta in self._stream_reply(query, context_data, outcome):
+                parts.append(delta)
+                yield delta
+            complete = outcome.get('complete', False)
+        
+        # A stream cut off partway, or replaced by the fallback, must not be served again from the cache
+        if complete and not openai_analysis.get('degraded'):
+            self._remember(cache_key, self._build_result(''.join(parts).strip(), stock_code, query_date, context_data))
+    
+    def _cache_key(self, query: str) -> Tuple[str, date, int]:
+        """Response cache key for a query"""
+        # Relative dates depend on the day and answers on the data files, so both are part of the key
+        return (' '.join(query.lower().split()), date.today(), self.csv_processor.generation)
+    
+    def _remember(self, cache_key: Tuple[str, date, int], result: Dict[str, Any]):
+        """Store a processed result, evicting the least recently used entry when full"""
+        self._response_cache[cache_key] = result
+        if len(self._response_cache) > _RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _analyze_query(self, query: str):
+        """Classify the query and load the trading data needed to answer it"""
+        # Step 1: Parse date from query
+        query_date = self.csv_processor.parse_date_from_query(query)
+        
+        # Step 2: A valid stock code plus a clear data keyword is answered without classifying
+        # remotely; anything more ambiguous gets one OpenAI call that classifies, extracts
+        # entities and drafts a reply
+        regex_stock_code = self._fallback_extract_stock_code(query)
+        openai_analysis = self._fallback_classify_intent(query) if regex_stock_code else None
+        stock_future = None
+        if openai_analysis and openai_analysis['intent'] in _STOCK_DATA_INTENTS:
+            openai_analysis['stock_code'] = regex_stock_code
+        else:
+            if regex_stock_code:
+                # Read the regex-found stock's data from disk while the OpenAI call is in flight
+                stock_future = self._lookup_pool.submit(
+                    self.csv_processor.get_stock_notional, regex_stock_code, query_date)
+            openai_analysis = self._combined_analyze_and_respond(query)
+        stock_code = openai_analysis.get('stock_code')
+        intent = openai_analysis.get('intent', 'general_query')
+        
+        # Step 3: Get trading data if relevant
+        context_data = None
+        if stock_code and intent in _STOCK_DATA_INTENTS:
+            if stock_future is not None and stock_code == regex_stock_code:
+                context_data = stock_future.result()
+            else:
+                context_data = self.csv_processor.get_stock_notional(stock_code, query_date)
+        
+        elif intent == 'summary_query':
+            context_data = self.csv_processor.get_market_summary(query_date)
+        
+        elif intent == 'market_query':
+            market_focus = openai_analysis.get('market_focus')
+            if market_focus:
+                # Handle market-specific queries
+                market_mappings = {
+                    'korea': '.KS', 'korean': '.KS',
+                    'china': '.SS', 'chinese': '.SS', 
+                    'japan': '.T', 'japanese': '.T',
+                    'australia': '.AX', 'australian': '.AX',
+                    'thai': '.BK', 'thailand': '.BK',
+                    'malaysia': '.KL', 'malaysian': '.KL',
+                    'india': '.NS', 'indian': '.NS'
+                }
+                if market_focus in market_mappings:
+                    stocks = self.csv_processor.get_stocks_by_market(market_mappings[market_focus], query_date)
+                    context_data = {'success': bool(stocks), 'stocks': stocks, 'market': market_focus}
+        
+        return openai_analysis, stock_code, query_date, context_data
+    
+    def _build_result(self, ai_response: str, stock_code: str, query_date: date,
+                      context_data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Assemble the process_query return payload"""
+        result = {
+            "success": True,
+            "response": ai_response,
+            "stock_code": stock_code,
+            "query_date": query_date.isoformat() if query_date else None,
+            "ai_processed": True
+        }
+        
+        # Add trading data to result if available
+        if context_data and context_data.get('success'):
+            result.update({
+                "notional_amount": context_data.get('notional', 0),
+                "quantity": context_data.get('quantity', 0),
+                "average_price": context_data.get('average_price', 0),
+                "trade_count": context_data.get('trade_count', 0),
+                "market": context_data.get('market', 'Unknown')
+            })
+        
+        return result
+    
+    def _process_query(self, query: str) -> Dict[str, Any]:
         """Process user query using OpenAI AI"""
         logger.info(f"Processing query with OpenAI: {query}")
         
         try:
-            # Step 1: Use OpenAI to classify intent and extract entities
-            openai_analysis = self.classify_intent_with_openai(query)
-            intent = openai_analysis.get('intent', 'general_query')
-            stock_code = openai_analysis.get('stock_code')
-            date_context = openai_analysis.get('date_context', 'unspecified')
-            
-            # Step 2: Parse date from query
-            query_date = self.csv_processor.parse_date_from_query(query)
-            
-            # Step 3: Get trading data if relevant
-            context_data = None
-            if stock_code and intent in ['notional_query', 'volume_query', 'price_query']:
-                context_data = self.csv_processor.get_stock_notional(stock_code, query_date)
-            
-            elif intent == 'summary_query':
-                context_data = self.csv_processor.get_market_summary(query_date)
+            openai_analysis, stock_code, query_date, context_data = self._analyze_query(query)
             
-            elif intent == 'market_query':
-                market_focus = openai_analysis.get('market_focus')
-                if market_focus:
-                    # Handle market-specific queries
-                    market_mappings = {
-                        'korea': '.KS', 'korean': '.KS',
-                        'china': '.SS', 'chinese': '.SS', 
-                        'japan': '.T', 'japanese': '.T',
-                        'australia': '.AX', 'australian': '.AX',
-                        'thai': '.BK', 'thailand': '.BK',
-                        'malaysia': '.KL', 'malaysian': '.KL',
-                        'india': '.NS', 'indian': '.NS'
-                    }
-                    if market_focus in market_mappings:
-                        stocks = self.csv_processor.get_stocks_by_market(market_mappings[market_focus], query_date)
-                        context_data = {'success': bool(stocks), 'stocks': stocks, 'market': market_focus}
-            
-            # Step 4: Generate intelligent response using OpenAI
-            ai_response = self.generate_openai_response(query, context_data)
-            
-            # Step 5: Prepare return data
-            result = {
-                "success": True,
-                "response": ai_response,
-                "stock_code": stock_code,
-                "query_date": query_date.isoformat() if query_date else None,
-                "ai_processed": True
-            }
-            
-            # Add trading data to result if available
-            if context_data and context_data.get('success'):
-                result.update({
-                    "notional_amount": context_data.get('notional', 0),
-                    "quantity": context_data.get('quantity', 0),
-                    "average_price": context_data.get('average_price', 0),
-                    "trade_count": context_data.get('trade_count', 0),
-                    "market": context_data.get('market', 'Unknown')
-                })
+            # Step 4: Reuse the draft when no trading data was needed, otherwise
+            # make the single follow-up call that grounds the reply in the data
+            response_draft = openai_analysis.get('response_draft')
+            if context_data is None and response_draft:
+                ai_response, from_openai = response_draft, True
+            else:
+                ai_response, from_openai = self._generate_reply(query, context_data)
             
+            # Step 5: Prepare return data; a reply from either fallback is not marked as AI-processed
+            result = self._build_result(ai_response, stock_code, query_date, context_data)
+            if not from_openai or openai_analysis.get('degraded'):
+                result['ai_processed'] = False
             return result
             
         except Exception as e:
@@ -309,7 +529,7 @@ This is automated trading data from our execution records."""
             # Fallback to simple response
             return {
                 "success": False,
-                "response": "I apologize, but I'm experiencing technical difficulties. Please try again in a moment.",
+                "response": _UNAVAILABLE_RESPONSE,
                 "stock_code": None,
                 "ai_processed": False
-            }
\ No newline at end of file
+            }
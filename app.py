@@ -1,10 +1,44 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime, date
-import plotly.express as px
+from datetime import date
 from ai_model import AIModel
-from csv_processor import CSVProcessor
-import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+# Canned queries behind the Quick Queries buttons
+KOREAN_QUERIES = (
+    "What is the notional for 005930.KS?",
+    "Show me KOSPI stocks today",
+    "Korean market summary"
+)
+CHINESE_QUERIES = (
+    "Trading volume for 600036.SS",
+    "Chinese stocks today",
+    "Shanghai market overview"
+)
+JAPANESE_QUERIES = (
+    "Price information for 7203.T",
+    "Japanese market data",
+    "All Tokyo stocks today"
+)
+MARKET_QUERIES = (
+    "Market overview for today",
+    "All markets summary",
+    "What trading data do you have?"
+)
+QUICK_QUERIES = KOREAN_QUERIES + CHINESE_QUERIES + JAPANESE_QUERIES + MARKET_QUERIES
+
+# Sidebar market list: (flag and name, ticker suffixes)
+SUPPORTED_MARKETS = (
+    ("🇭🇰 Hong Kong", ".HK"),
+    ("🇰🇷 Korea", ".KS, .KQ"),
+    ("🇨🇳 China", ".SS, .SH, .SZ, .ZK"),
+    ("🇯🇵 Japan", ".T, .TO"),
+    ("🇦🇺 Australia", ".AX"),
+    ("🇹🇭 Thailand", ".BK, .TB"),
+    ("🇲🇾 Malaysia", ".KL"),
+    ("🇮🇳 India", ".NS, .BO"),
+    ("🇺🇸 US", ".US, .NASDAQ, .NYSE")
+)
 
 # Initialize AI model and CSV processor
 @st.cache_resource
@@ -13,12 +47,34 @@ def load_ai_model():
 
 @st.cache_resource
 def load_csv_processor():
-    return CSVProcessor()
+    # Share the model's processor so the sidebar and the chat read through one set of caches
+    return load_ai_model().csv_processor
 
 # Initialize components
 ai_model = load_ai_model()
 csv_processor = load_csv_processor()
 
+# Keyed on the day and data generation so new sample data or a new day recomputes the answers
+@st.cache_resource(max_entries=1, show_spinner=False)
+def precompute_quick_queries(today: date, data_generation: int) -> Dict[str, Future]:
+    """Answer every quick query in the background so button clicks don't wait on the model"""
+    executor = ThreadPoolExecutor(max_workers=4)
+    futures = {query: executor.submit(ai_model.process_query, query) for query in QUICK_QUERIES}
+    executor.shutdown(wait=False)
+    return futures
+
+# Survives reruns, so repeat clicks of the same button return without touching the model;
+# keyed on the day too, since queries like "today" must not reuse the previous day's answer
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_process_query(query: str, today: date, data_generation: int) -> dict:
+    """Process a query once per day and generation of the data files and reuse the result"""
+    return ai_model.process_query(query)
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings of a query share a cache entry"""
+    # Case is kept: replies echo the stock code as typed
+    return ' '.join(query.split())
+
 # Page configuration
 st.set_page_config(
     page_title="International Stock Trading Chatbot",
@@ -44,26 +100,6 @@ st.markdown("""
         max-height: 500px;
         overflow-y: auto;
     }
-    .user-message {
-        background-color: #1f77b4;
-        color: white;
-        padding: 10px 15px;
-        border-radius: 15px;
-        margin: 5px 0;
-        max-width: 70%;
-        margin-left: auto;
-        text-align: right;
-    }
-    .bot-message {
-        background-color: #e6e6e6;
-        color: black;
-        padding: 10px 15px;
-        border-radius: 15px;
-        margin: 5px 0;
-        max-width: 70%;
-        margin-right: auto;
-        white-space: pre-line;
-    }
     .success-box {
         background-color: #d4edda;
         border: 1px solid #c3e6cb;
@@ -90,47 +126,46 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def create_sample_data():
-    """Create sample CSV data with international stocks"""
-    import pandas as pd
-    from datetime import datetime, timedelta
-    
-    if not os.path.exists('data'):
-        os.makedirs('data')
+def markdown_lines(text: str) -> str:
+    """Keep the text's line breaks and dollar signs, which markdown would fold into spaces or read as LaTeX"""
+    # A pair of $ (e.g. "HK$27.44 - HK$27.60") would otherwise render as inline math
+    return text.replace("$", "\\$").replace("\n", "  \n")
+
+def stream_response(query: str) -> str:
+    """Render the model's reply as it streams in and return the full, unescaped text"""
+    parts = []
     
-    # Create data for last 3 days
-    base_date = datetime.now().date()
+    def rendered_chunks():
+        for chunk in ai_model.process_query_streaming(query):
+            parts.append(chunk)
+            yield markdown_lines(chunk)
     
-    for days_ago in range(3):
-        date_obj = base_date - timedelta(days=days_ago)
-        filename = f"data/ClientExecution_{date_obj.strftime('%Y%m%d')}.csv"
-        
-        # Sample data with international stocks
-        data = {
-            'Timestamp': [
-                '09:30:15.048448', '10:15:22.123456', '11:30:45.789123',
-                '14:20:33.456789', '15:45:12.987654', '16:10:05.111222',
-                '09:35:18.222333', '10:45:30.444555', '11:55:42.666777'
-            ],
-            'ClientName': ['ABC', 'XYZ', 'DEF', 'ABC', 'GHI', 'XYZ', 'JKL', 'MNO', 'PQR'],
-            'AccountName': ['ABC_account', 'XYZ_invest', 'DEF_trading', 
-                           'ABC_account', 'GHI_fund', 'XYZ_invest', 
-                           'JKL_group', 'MNO_invest', 'PQR_fund'],
-            'Instrument': [
-                '0148.HK', '005930.KS', '600036.SS', 
-                '7203.T', 'BHP.AX', '0148.HK',
-                '035420.KQ', '000001.SZ', 'AIRTEL.NS'
-            ],
-            'Quantity': [10000, 500, 20000, 1000, 3000, 8000, 800, 15000, 2500],
-            'Price': [27.44, 75000.0, 35.20, 2500.0, 45.50, 27.60, 180000.0, 15.80, 850.0]
-        }
-        
-        # Adjust prices slightly for different days
-        price_adjust = days_ago * 0.1
-        data['Price'] = [p + price_adjust for p in data['Price']]
-        
-        df = pd.DataFrame(data)
-        df.to_csv(filename, sep=';', index=False)
+    st.write_stream(rendered_chunks())
+    return "".join(parts)
+
+def quick_query_response(query: str, precomputed: Dict[str, Future], data_generation: int) -> str:
+    """Render a quick query's reply from the precomputed answers, falling back to the cached model call"""
+    future = precomputed.get(query)
+    if future is not None and future.done() and future.exception() is None:
+        response = future.result()["response"]
+    else:
+        response = cached_process_query(normalize_query(query), date.today(), data_generation)["response"]
+    st.markdown(markdown_lines(response))
+    return response
+
+def add_exchange(chat_container, query: str, precomputed: Dict[str, Future] = None, data_generation: int = 0):
+    """Show a query and its reply at the end of the chat and record both in the history"""
+    st.session_state.messages.append({"role": "user", "content": query})
+    with chat_container:
+        with st.chat_message("user"):
+            st.markdown(markdown_lines(query))
+        with st.chat_message("assistant"):
+            if precomputed is None:
+                # Stream the AI response as it is generated
+                response = stream_response(query)
+            else:
+                response = quick_query_response(query, precomputed, data_generation)
+    st.session_state.messages.append({"role": "assistant", "content": response})
 
 def main():
     # Header
@@ -140,46 +175,40 @@ def main():
     with st.sidebar:
         st.header("📊 System Info")
         
-        # Available dates
-        available_dates = csv_processor.get_available_dates()
-        if available_dates:
-            st.subheader("Available Dates")
-            for d in available_dates:
-                st.write(f"• {d.strftime('%Y-%m-%d')}")
-        else:
-            st.warning("No CSV data files found")
-            
+        # Available dates, filled in after the quick actions so newly created files show without a rerun
+        dates_area = st.container()
+        
         # Available markets
         st.subheader("🌐 Supported Markets")
-        markets = [
-            ("🇭🇰 Hong Kong", ".HK"),
-            ("🇰🇷 Korea", ".KS, .KQ"),
-            ("🇨🇳 China", ".SS, .SH, .SZ, .ZK"),
-            ("🇯🇵 Japan", ".T, .TO"),
-            ("🇦🇺 Australia", ".AX"),
-            ("🇹🇭 Thailand", ".BK, .TB"),
-            ("🇲🇾 Malaysia", ".KL"),
-            ("🇮🇳 India", ".NS, .BO"),
-            ("🇺🇸 US", ".US, .NASDAQ, .NYSE")
-        ]
-        
-        for flag, suffixes in markets:
+        for flag, suffixes in SUPPORTED_MARKETS:
             st.write(f"{flag} {suffixes}")
         
         # Quick actions
         st.header("🚀 Quick Actions")
         if st.button("Create Sample Data", use_container_width=True):
             try:
+                from create_sample_data import create_sample_data
                 create_sample_data()
+                # New files: drop cached frames and query results built from the old ones
+                csv_processor.clear_cache()
+                cached_process_query.clear()
                 st.success("Sample international data created successfully!")
-                st.rerun()
             except Exception as e:
                 st.error(f"Error creating sample data: {e}")
         
         if st.button("Clear Chat History", use_container_width=True):
-            if "messages" in st.session_state:
-                st.session_state.messages = []
-            st.rerun()
+            st.session_state.messages = []
+        
+        with dates_area:
+            # One stat of the data directory (plus the loaded days' files) when nothing changed; a
+            # changed file bumps csv_processor.generation, which keys every cached answer below
+            available_dates = csv_processor.get_available_dates()
+            if available_dates:
+                st.subheader("Available Dates")
+                for d in available_dates:
+                    st.write(f"• {d.strftime('%Y-%m-%d')}")
+            else:
+                st.warning("No CSV data files found")
         
         # System status
         st.header("🔧 System Status")
@@ -187,116 +216,56 @@ def main():
         st.success("✅ AI Model: Ready")
         st.success(f"✅ Supported Markets: {len(csv_processor.supported_markets)}")
         
+    data_generation = csv_processor.generation
+    precomputed = precompute_quick_queries(date.today(), data_generation)
+    
+    # Chat input is pinned to the bottom of the page
+    user_input = st.chat_input("e.g., What is the notional for 005930.KS? or Show me Korean market summary")
+    
+    # Initialize chat history
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+    
     # Main content area
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.header("💬 Chat Interface")
         
-        # Initialize chat history
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-        
-        # Display chat messages
+        # Display chat messages; new exchanges are appended in place, so no rerun is needed
         chat_container = st.container()
         with chat_container:
             for message in st.session_state.messages:
-                if message["role"] == "user":
-                    st.markdown(f'<div class="user-message">{message["content"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="bot-message">{message["content"]}</div>', unsafe_allow_html=True)
-        
-        # Chat input
-        user_input = st.text_input(
-            "Ask about international stock trading data:", 
-            placeholder="e.g., What is the notional for 005930.KS? or Show me Korean market summary"
-        )
-        
-        col1_1, col1_2 = st.columns([1, 1])
-        with col1_1:
-            if st.button("Send Message", use_container_width=True, type="primary"):
-                if user_input:
-                    # Add user message to chat history
-                    st.session_state.messages.append({"role": "user", "content": user_input})
-                    
-                    # Get AI response
-                    with st.spinner("Analyzing your query..."):
-                        result = ai_model.process_query(user_input)
-                    
-                    # Add bot response to chat history
-                    st.session_state.messages.append({"role": "assistant", "content": result["response"]})
-                    
-                    # Rerun to update the display
-                    st.rerun()
+                with st.chat_message(message["role"]):
+                    # History holds the raw text; escape it the same way as when it was first shown
+                    st.markdown(markdown_lines(message["content"]))
         
-        with col1_2:
-            if st.button("Clear Chat", use_container_width=True):
-                st.session_state.messages = []
-                st.rerun()
+        if user_input:
+            add_exchange(chat_container, user_input)
     
     with col2:
         st.header("📈 Quick Queries")
         
         # International stock examples
         st.subheader("🇰🇷 Korean Stocks")
-        korean_queries = [
-            "What is the notional for 005930.KS?",
-            "Show me KOSPI stocks today",
-            "Korean market summary"
-        ]
-        
-        for query in korean_queries:
+        for query in KOREAN_QUERIES:
             if st.button(query, use_container_width=True):
-                st.session_state.messages.append({"role": "user", "content": query})
-                with st.spinner("Analyzing..."):
-                    result = ai_model.process_query(query)
-                st.session_state.messages.append({"role": "assistant", "content": result["response"]})
-                st.rerun()
+                add_exchange(chat_container, query, precomputed, data_generation)
         
         st.subheader("🇨🇳 Chinese Stocks")
-        chinese_queries = [
-            "Trading volume for 600036.SS",
-            "Chinese stocks today",
-            "Shanghai market overview"
-        ]
-        
-        for query in chinese_queries:
+        for query in CHINESE_QUERIES:
             if st.button(query, use_container_width=True):
-                st.session_state.messages.append({"role": "user", "content": query})
-                with st.spinner("Analyzing..."):
-                    result = ai_model.process_query(query)
-                st.session_state.messages.append({"role": "assistant", "content": result["response"]})
-                st.rerun()
+                add_exchange(chat_container, query, precomputed, data_generation)
         
         st.subheader("🇯🇵 Japanese Stocks")
-        japanese_queries = [
-            "Price information for 7203.T",
-            "Japanese market data",
-            "All Tokyo stocks today"
-        ]
-        
-        for query in japanese_queries:
+        for query in JAPANESE_QUERIES:
             if st.button(query, use_container_width=True):
-                st.session_state.messages.append({"role": "user", "content": query})
-                with st.spinner("Analyzing..."):
-                    result = ai_model.process_query(query)
-                st.session_state.messages.append({"role": "assistant", "content": result["response"]})
-                st.rerun()
+                add_exchange(chat_container, query, precomputed, data_generation)
         
         st.subheader("🌐 Market Overview")
-        market_queries = [
-            "Market overview for today",
-            "All markets summary",
-            "What trading data do you have?"
-        ]
-        
-        for query in market_queries:
+        for query in MARKET_QUERIES:
             if st.button(query, use_container_width=True):
-                st.session_state.messages.append({"role": "user", "content": query})
-                with st.spinner("Analyzing..."):
-                    result = ai_model.process_query(query)
-                st.session_state.messages.append({"role": "assistant", "content": result["response"]})
-                st.rerun()
+                add_exchange(chat_container, query, precomputed, data_generation)
         
         st.header("ℹ️ How to Use")
         st.info("""
@@ -1,7 +1,151 @@
 import os
+import csv
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import random
+from concurrent.futures import ThreadPoolExecutor
+
+# International stock universe with realistic data
+_STOCKS = [
+    # Hong Kong
+    {'code': '0148.HK', 'name': 'Kingboard Holdings', 'base_price': 27.50, 'volatility': 0.02},
+    {'code': '0700.HK', 'name': 'Tencent Holdings', 'base_price': 320.00, 'volatility': 0.03},
+    {'code': '0941.HK', 'name': 'China Mobile', 'base_price': 52.00, 'volatility': 0.015},
+    
+    # Korea - KOSPI
+    {'code': '005930.KS', 'name': 'Samsung Electronics', 'base_price': 75000.00, 'volatility': 0.025},
+    {'code': '000660.KS', 'name': 'SK Hynix', 'base_price': 120000.00, 'volatility': 0.035},
+    {'code': '051910.KS', 'name': 'LG Chem', 'base_price': 450000.00, 'volatility': 0.028},
+    
+    # Korea - KOSDAQ
+    {'code': '035420.KQ', 'name': 'NAVER', 'base_price': 180000.00, 'volatility': 0.032},
+    {'code': '067280.KQ', 'name': 'Kakao', 'base_price': 42000.00, 'volatility': 0.040},
+    
+    # China - Shanghai
+    {'code': '600036.SS', 'name': 'China Merchants Bank', 'base_price': 35.20, 'volatility': 0.018},
+    {'code': '601318.SS', 'name': 'Ping An Insurance', 'base_price': 45.80, 'volatility': 0.022},
+    {'code': '600519.SS', 'name': 'Kweichow Moutai', 'base_price': 1600.00, 'volatility': 0.020},
+    
+    # China - Shenzhen
+    {'code': '000001.SZ', 'name': 'Ping An Bank', 'base_price': 12.50, 'volatility': 0.015},
+    {'code': '000858.SZ', 'name': 'Wuliangye', 'base_price': 180.00, 'volatility': 0.025},
+    {'code': '002415.SZ', 'name': 'Hikvision', 'base_price': 35.00, 'volatility': 0.020},
+    
+    # Japan
+    {'code': '7203.T', 'name': 'Toyota Motor', 'base_price': 2500.00, 'volatility': 0.016},
+    {'code': '9984.TO', 'name': 'SoftBank Group', 'base_price': 6500.00, 'volatility': 0.030},
+    {'code': '6758.T', 'name': 'Sony Group', 'base_price': 12000.00, 'volatility': 0.022},
+    
+    # Australia
+    {'code': 'BHP.AX', 'name': 'BHP Group', 'base_price': 45.50, 'volatility': 0.020},
+    {'code': 'CBA.AX', 'name': 'Commonwealth Bank', 'base_price': 85.00, 'volatility': 0.015},
+    {'code': 'CSL.AX', 'name': 'CSL Limited', 'base_price': 260.00, 'volatility': 0.018},
+    
+    # Thailand
+    {'code': 'PTT.BK', 'name': 'PTT PCL', 'base_price': 35.00, 'volatility': 0.012},
+    {'code': 'AOT.BK', 'name': 'Airports of Thailand', 'base_price': 60.00, 'volatility': 0.025},
+    
+    # Malaysia
+    {'code': 'MAYBANK.KL', 'name': 'Malayan Banking', 'base_price': 8.50, 'volatility': 0.010},
+    {'code': 'TENAGA.KL', 'name': 'Tenaga Nasional', 'base_price': 9.20, 'volatility': 0.008},
+    
+    # India
+    {'code': 'RELIANCE.NS', 'name': 'Reliance Industries', 'base_price': 2400.00, 'volatility': 0.018},
+    {'code': 'AIRTEL.NS', 'name': 'Bharti Airtel', 'base_price': 850.00, 'volatility': 0.022},
+    {'code': 'TCS.NS', 'name': 'Tata Consultancy', 'base_price': 3200.00, 'volatility': 0.015},
+    
+    # Singapore
+    {'code': 'D05.SI', 'name': 'DBS Group', 'base_price': 28.00, 'volatility': 0.012},
+    {'code': 'U11.SI', 'name': 'United Overseas Bank', 'base_price': 24.50, 'volatility': 0.010},
+    
+    # Taiwan
+    {'code': '2330.TW', 'name': 'TSMC', 'base_price': 580.00, 'volatility': 0.020},
+    {'code': '2454.TW', 'name': 'MediaTek', 'base_price': 720.00, 'volatility': 0.025},
+    
+    # US (for completeness)
+    {'code': 'AAPL.US', 'name': 'Apple Inc', 'base_price': 180.00, 'volatility': 0.022},
+    {'code': 'TSLA.US', 'name': 'Tesla Inc', 'base_price': 240.00, 'volatility': 0.045},
+]
+
+# Stock attributes as parallel arrays so each day's trades are drawn in a few vectorized calls
+CODES = np.array([s['code'] for s in _STOCKS])
+BASE_PRICES = np.array([s['base_price'] for s in _STOCKS], dtype=np.float64)
+VOLATILITIES = np.array([s['volatility'] for s in _STOCKS], dtype=np.float64)
+
+# Client names for variety
+CLIENTS = np.array(['ABC', 'XYZ', 'DEF', 'GHI', 'JKL', 'MNO', 'PQR', 'STU', 'VWX', 'YZZ'])
+ACCOUNT_SUFFIXES = np.array(['_account', '_invest', '_trading', '_fund', '_group', '_asset', '_wealth'])
+
+# Lot size ranges by price band: high-priced stocks (Korean/Japanese) trade in
+# smaller lots than medium- and low-priced ones
+_PRICE_BANDS = np.array([100, 1000])
+_LOT_MIN = np.array([1000, 100, 10])
+_LOT_MAX = np.array([20000, 5000, 500])
+
+def _generate_day(rng, base_prices, volatilities, days_ago, num_trades):
+    """Draw one day's trades as arrays: stock index, price, quantity and time of day"""
+    # Select random stocks
+    stock_idx = rng.integers(0, len(base_prices), num_trades)
+    
+    # Generate realistic price based on base price and volatility
+    days_effect = days_ago * 0.005  # Small daily trend
+    random_effect = rng.uniform(-volatilities[stock_idx], volatilities[stock_idx])
+    prices = np.round(base_prices[stock_idx] * (1 + days_effect + random_effect), 2)
+    
+    # Generate realistic quantity based on stock price, one draw per trade within its band
+    band = np.searchsorted(_PRICE_BANDS, prices, side='left')
+    quantities = rng.integers(_LOT_MIN[band], _LOT_MAX[band], endpoint=True)
+    
+    # Generate random timestamps during trading hours
+    hours = rng.integers(9, 17, num_trades)
+    minutes = rng.integers(0, 60, num_trades)
+    seconds = rng.integers(0, 60, num_trades)
+    microseconds = rng.integers(0, 1000000, num_trades)
+    return stock_idx, prices, quantities, hours, minutes, seconds, microseconds
+
+def create_sample_data():
+    """Create a small fixed set of sample CSV files for the last 3 days"""
+    if not os.path.exists('data'):
+        os.makedirs('data')
+    
+    # Create data for last 3 days
+    base_date = datetime.now().date()
+    
+    # Sample data with international stocks
+    columns = ['Timestamp', 'ClientName', 'AccountName', 'Instrument', 'Quantity', 'Price']
+    timestamps = [
+        '09:30:15.048448', '10:15:22.123456', '11:30:45.789123',
+        '14:20:33.456789', '15:45:12.987654', '16:10:05.111222',
+        '09:35:18.222333', '10:45:30.444555', '11:55:42.666777'
+    ]
+    clients = ['ABC', 'XYZ', 'DEF', 'ABC', 'GHI', 'XYZ', 'JKL', 'MNO', 'PQR']
+    accounts = ['ABC_account', 'XYZ_invest', 'DEF_trading', 
+                'ABC_account', 'GHI_fund', 'XYZ_invest', 
+                'JKL_group', 'MNO_invest', 'PQR_fund']
+    instruments = [
+        '0148.HK', '005930.KS', '600036.SS', 
+        '7203.T', 'BHP.AX', '0148.HK',
+        '035420.KQ', '000001.SZ', 'AIRTEL.NS'
+    ]
+    quantities = [10000, 500, 20000, 1000, 3000, 8000, 800, 15000, 2500]
+    prices = [27.44, 75000.0, 35.20, 2500.0, 45.50, 27.60, 180000.0, 15.80, 850.0]
+    
+    def write_day(days_ago: int):
+        date_obj = base_date - timedelta(days=days_ago)
+        filename = f"data/ClientExecution_{date_obj.strftime('%Y%m%d')}.csv"
+        
+        # Adjust prices slightly for different days
+        day_prices = [p + days_ago * 0.1 for p in prices]
+        
+        # Nine fixed rows don't need a DataFrame; write them straight out in the same format
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f, delimiter=';', lineterminator='\n')
+            writer.writerow(columns)
+            writer.writerows(zip(timestamps, clients, accounts, instruments, quantities, day_prices))
+    
+    # Each day is its own file, so the writes can run side by side
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(write_day, range(3)))
 
 def create_international_sample_data():
     """Create comprehensive sample CSV files with international stocks"""
@@ -12,126 +156,57 @@ def create_international_sample_data():
     # Create data for the last 7 days to have more variety
     base_date = datetime.now().date()
     
-    # International stock universe with realistic data
-    international_stocks = [
-        # Hong Kong
-        {'code': '0148.HK', 'name': 'Kingboard Holdings', 'base_price': 27.50, 'volatility': 0.02},
-        {'code': '0700.HK', 'name': 'Tencent Holdings', 'base_price': 320.00, 'volatility': 0.03},
-        {'code': '0941.HK', 'name': 'China Mobile', 'base_price': 52.00, 'volatility': 0.015},
-        
-        # Korea - KOSPI
-        {'code': '005930.KS', 'name': 'Samsung Electronics', 'base_price': 75000.00, 'volatility': 0.025},
-        {'code': '000660.KS', 'name': 'SK Hynix', 'base_price': 120000.00, 'volatility': 0.035},
-        {'code': '051910.KS', 'name': 'LG Chem', 'base_price': 450000.00, 'volatility': 0.028},
-        
-        # Korea - KOSDAQ
-        {'code': '035420.KQ', 'name': 'NAVER', 'base_price': 180000.00, 'volatility': 0.032},
-        {'code': '067280.KQ', 'name': 'Kakao', 'base_price': 42000.00, 'volatility': 0.040},
-        
-        # China - Shanghai
-        {'code': '600036.SS', 'name': 'China Merchants Bank', 'base_price': 35.20, 'volatility': 0.018},
-        {'code': '601318.SS', 'name': 'Ping An Insurance', 'base_price': 45.80, 'volatility': 0.022},
-        {'code': '600519.SS', 'name': 'Kweichow Moutai', 'base_price': 1600.00, 'volatility': 0.020},
-        
-        # China - Shenzhen
-        {'code': '000001.SZ', 'name': 'Ping An Bank', 'base_price': 12.50, 'volatility': 0.015},
-        {'code': '000858.SZ', 'name': 'Wuliangye', 'base_price': 180.00, 'volatility': 0.025},
-        {'code': '002415.SZ', 'name': 'Hikvision', 'base_price': 35.00, 'volatility': 0.020},
-        
-        # Japan
-        {'code': '7203.T', 'name': 'Toyota Motor', 'base_price': 2500.00, 'volatility': 0.016},
-        {'code': '9984.TO', 'name': 'SoftBank Group', 'base_price': 6500.00, 'volatility': 0.030},
-        {'code': '6758.T', 'name': 'Sony Group', 'base_price': 12000.00, 'volatility': 0.022},
-        
-        # Australia
-        {'code': 'BHP.AX', 'name': 'BHP Group', 'base_price': 45.50, 'volatility': 0.020},
-        {'code': 'CBA.AX', 'name': 'Commonwealth Bank', 'base_price': 85.00, 'volatility': 0.015},
-        {'code': 'CSL.AX', 'name': 'CSL Limited', 'base_price': 260.00, 'volatility': 0.018},
-        
-        # Thailand
-        {'code': 'PTT.BK', 'name': 'PTT PCL', 'base_price': 35.00, 'volatility': 0.012},
-        {'code': 'AOT.BK', 'name': 'Airports of Thailand', 'base_price': 60.00, 'volatility': 0.025},
-        
-        # Malaysia
-        {'code': 'MAYBANK.KL', 'name': 'Malayan Banking', 'base_price': 8.50, 'volatility': 0.010},
-        {'code': 'TENAGA.KL', 'name': 'Tenaga Nasional', 'base_price': 9.20, 'volatility': 0.008},
-        
-        # India
-        {'code': 'RELIANCE.NS', 'name': 'Reliance Industries', 'base_price': 2400.00, 'volatility': 0.018},
-        {'code': 'AIRTEL.NS', 'name': 'Bharti Airtel', 'base_price': 850.00, 'volatility': 0.022},
-        {'code': 'TCS.NS', 'name': 'Tata Consultancy', 'base_price': 3200.00, 'volatility': 0.015},
-        
-        # Singapore
-        {'code': 'D05.SI', 'name': 'DBS Group', 'base_price': 28.00, 'volatility': 0.012},
-        {'code': 'U11.SI', 'name': 'United Overseas Bank', 'base_price': 24.50, 'volatility': 0.010},
-        
-        # Taiwan
-        {'code': '2330.TW', 'name': 'TSMC', 'base_price': 580.00, 'volatility': 0.020},
-        {'code': '2454.TW', 'name': 'MediaTek', 'base_price': 720.00, 'volatility': 0.025},
-        
-        # US (for completeness)
-        {'code': 'AAPL.US', 'name': 'Apple Inc', 'base_price': 180.00, 'volatility': 0.022},
-        {'code': 'TSLA.US', 'name': 'Tesla Inc', 'base_price': 240.00, 'volatility': 0.045},
-    ]
+    # Seeded so the same SFSBOT_SEED on the same day reproduces identical files
+    rng = np.random.default_rng(int(os.environ.get('SFSBOT_SEED', '42')))
     
-    # Client names for variety
-    clients = ['ABC', 'XYZ', 'DEF', 'GHI', 'JKL', 'MNO', 'PQR', 'STU', 'VWX', 'YZZ']
-    account_suffixes = ['_account', '_invest', '_trading', '_fund', '_group', '_asset', '_wealth']
+    # Trades for every day are collected column-wise and written out per day at the end
+    columns = {'Date': [], 'Timestamp': [], 'ClientName': [], 'AccountName': [],
+               'Instrument': [], 'Quantity': [], 'Price': []}
     
     for days_ago in range(7):  # Create 7 days of data
         date_obj = base_date - timedelta(days=days_ago)
-        filename = f"data/ClientExecution_{date_obj.strftime('%Y%m%d')}.csv"
-        
-        all_trades = []
         
         # Generate 20-30 random trades per day
-        num_trades = random.randint(20, 30)
+        num_trades = int(rng.integers(20, 31))
         
-        for _ in range(num_trades):
-            # Select random stock
-            stock = random.choice(international_stocks)
-            
-            # Generate realistic price based on base price and volatility
-            days_effect = days_ago * 0.005  # Small daily trend
-            random_effect = random.uniform(-stock['volatility'], stock['volatility'])
-            price = stock['base_price'] * (1 + days_effect + random_effect)
-            price = round(price, 2)
-            
-            # Generate realistic quantity based on stock price
-            if price > 1000:  # High-priced stocks (Korean/Japanese)
-                quantity = random.randint(10, 500)
-            elif price > 100:  # Medium-priced stocks
-                quantity = random.randint(100, 5000)
-            else:  # Low-priced stocks
-                quantity = random.randint(1000, 20000)
-            
-            # Generate random timestamp during trading hours
-            hour = random.randint(9, 16)
-            minute = random.randint(0, 59)
-            second = random.randint(0, 59)
-            microsecond = random.randint(0, 999999)
-            timestamp = f"{hour:02d}:{minute:02d}:{second:02d}.{microsecond:06d}"
-            
-            # Select random client and account
-            client = random.choice(clients)
-            account_suffix = random.choice(account_suffixes)
-            account_name = client + account_suffix
-            
-            trade = {
-                'Timestamp': timestamp,
-                'ClientName': client,
-                'AccountName': account_name,
-                'Instrument': stock['code'],
-                'Quantity': quantity,
-                'Price': price
-            }
-            
-            all_trades.append(trade)
+        stock_idx, prices, quantities, hours, minutes, seconds, microseconds = _generate_day(
+            rng, BASE_PRICES, VOLATILITIES, days_ago, num_trades)
+        # tolist() hands the f-string plain ints instead of boxing a NumPy scalar per field
+        timestamps = [f"{h:02d}:{m:02d}:{s:02d}.{us:06d}"
+                      for h, m, s, us in zip(hours.tolist(), minutes.tolist(),
+                                             seconds.tolist(), microseconds.tolist())]
         
-        # Create DataFrame and save
-        df = pd.DataFrame(all_trades)
-        df.to_csv(filename, sep=';', index=False)
-        print(f"Created {filename} with {len(all_trades)} trades")
+        # Select random clients and accounts
+        trade_clients = CLIENTS[rng.integers(0, len(CLIENTS), num_trades)]
+        account_names = np.char.add(trade_clients, ACCOUNT_SUFFIXES[rng.integers(0, len(ACCOUNT_SUFFIXES), num_trades)])
+        
+        columns['Date'].append(np.full(num_trades, date_obj.strftime('%Y%m%d')))
+        columns['Timestamp'].append(timestamps)
+        columns['ClientName'].append(trade_clients)
+        columns['AccountName'].append(account_names)
+        columns['Instrument'].append(CODES[stock_idx])
+        columns['Quantity'].append(quantities)
+        columns['Price'].append(prices)
+    
+    # Create one DataFrame for the whole week and save a file per day
+    all_trades = pd.DataFrame({name: np.concatenate(parts) for name, parts in columns.items()})
+    file_columns = [c for c in all_trades.columns if c != 'Date']
+    
+    def write_day(group):
+        date_str, day_trades = group
+        filename = f"data/ClientExecution_{date_str}.csv"
+        # Select the output columns in the writer rather than copying the group without Date
+        day_trades.to_csv(filename, sep=';', index=False, columns=file_columns)
+        return filename, len(day_trades)
+    
+    # Each day is its own file, so the writes can run side by side
+    with ThreadPoolExecutor(max_workers=min(7, os.cpu_count() or 1)) as executor:
+        for filename, num_trades in executor.map(write_day, all_trades.groupby('Date', sort=False)):
+            print(f"Created {filename} with {num_trades} trades")
+
+def _market_suffix(instruments: pd.Series) -> pd.Series:
+    """Market suffix of each ticker, or 'Unknown' for tickers without one"""
+    return instruments.str.rsplit('.', n=1).str[-1].where(instruments.str.contains('.', regex=False), 'Unknown')
 
 def create_market_summary_report():
     """Create a summary report of all generated data"""
@@ -143,7 +218,8 @@ def create_market_summary_report():
         print("No data directory found. Please run create_sample_data() first.")
         return
     
-    csv_files = [f for f in os.listdir('data') if f.startswith('ClientExecution_') and f.endswith('.csv')]
+    with os.scandir('data') as entries:
+        csv_files = sorted(e.name for e in entries if e.name.startswith('ClientExecution_') and e.name.endswith('.csv'))
     
     if not csv_files:
         print("No CSV files found in data directory.")
@@ -151,48 +227,42 @@ def create_market_summary_report():
     
     print(f"Found {len(csv_files)} trading day files:")
     
-    all_stocks = set()
-    market_counts = {}
-    total_trades = 0
-    
-    for filename in sorted(csv_files):
+    # Collect each file's instruments tagged with its date, then aggregate everything at once
+    frames = []
+    for filename in csv_files:
         filepath = os.path.join('data', filename)
         try:
-            df = pd.read_csv(filepath, delimiter=';')
+            # Only the instrument column is needed; the row count comes with it
+            df = pd.read_csv(filepath, delimiter=';', usecols=['Instrument'], dtype={'Instrument': str})
             date_str = filename.replace('ClientExecution_', '').replace('.csv', '')
-            
-            stocks_in_file = set(df['Instrument'].unique())
-            all_stocks.update(stocks_in_file)
-            
-            # Count by market
-            for stock in stocks_in_file:
-                market = stock.split('.')[-1] if '.' in stock else 'Unknown'
-                market_counts[market] = market_counts.get(market, 0) + 1
-            
-            total_trades += len(df)
-            print(f"  📅 {date_str}: {len(df)} trades, {len(stocks_in_file)} stocks")
+            frames.append(df.assign(Date=date_str))
             
         except Exception as e:
             print(f"  ❌ Error reading {filename}: {e}")
     
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Instrument', 'Date'])
+    per_day = trades.groupby('Date', sort=False)['Instrument'].agg(['size', 'nunique'])
+    for date_str, row in per_day.iterrows():
+        print(f"  📅 {date_str}: {row['size']} trades, {row['nunique']} stocks")
+    
+    # Market is the ticker suffix; each stock counts once per day it traded
+    day_stocks = trades.drop_duplicates(['Date', 'Instrument'])['Instrument']
+    market_counts = _market_suffix(day_stocks).value_counts().sort_index()
+    
+    all_stocks = pd.Series(sorted(trades['Instrument'].unique()), dtype=object)
+    
     print(f"\n📈 TOTAL OVERVIEW:")
     print(f"  • Unique stocks: {len(all_stocks)}")
-    print(f"  • Total trades: {total_trades}")
+    print(f"  • Total trades: {len(trades)}")
     print(f"  • Trading days: {len(csv_files)}")
     
     print(f"\n🌐 MARKET BREAKDOWN:")
-    for market, count in sorted(market_counts.items()):
+    for market, count in market_counts.items():
         print(f"  • {market}: {count} stocks")
     
     print(f"\n🎯 SAMPLE STOCKS BY MARKET:")
-    markets = {}
-    for stock in sorted(all_stocks):
-        market = stock.split('.')[-1] if '.' in stock else 'Unknown'
-        if market not in markets:
-            markets[market] = []
-        markets[market].append(stock)
-    
-    for market, stocks in markets.items():
+    for market, stocks in all_stocks.groupby(_market_suffix(all_stocks), sort=False):
+        stocks = stocks.tolist()
         print(f"  {market}: {', '.join(stocks[:3])}{'...' if len(stocks) > 3 else ''}")
     
     print("\n✅ Sample data ready! You can now run: streamlit run app.py")
@@ -1,17 +1,100 @@
+import numpy as np
 import pandas as pd
 import os
 import re
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Most days kept loaded at once; the least recently used day is dropped beyond this
+_CACHE_MAX_DAYS = 16
+
+# Data files are named ClientExecution_YYYYMMDD.csv
+_FILENAME_PREFIX = "ClientExecution_"
+_FILENAME_SUFFIX = ".csv"
+_NUMERIC_ONLY_RE = re.compile(r'^\d+$')
+
+# Only these columns are used downstream; pinning their types skips pandas' per-column inference
+_CSV_COLUMNS = ['Instrument', 'Quantity', 'Price']
+# Quantity is read as float64 so a blank or fractional cell can't make the whole day fail to parse
+_CSV_DTYPES = {'Instrument': str, 'Quantity': 'float64', 'Price': 'float64'}
+
+# Relative date phrases, each matched as whole words in one pass over the query
+_TODAY_RE = re.compile(r'\b(?:today|current day|now)\b')
+_DAY_BEFORE_YESTERDAY_RE = re.compile(r'\b(?:day before yesterday|2 days ago)\b')
+_YESTERDAY_RE = re.compile(r'\b(?:yesterday|previous day)\b')
+_THIS_WEEK_RE = re.compile(r'\b(?:this week|current week)\b')
+_LAST_WEEK_RE = re.compile(r'\b(?:last week|previous week)\b')
+
+# Field widths of the numeric date layouts, in the order they are tried
+_NUMERIC_DATE_WIDTHS = (
+    (4, 2, 2),  # 2025-10-25, 2025/10/25
+    (2, 2, 4),  # 25-10-2025, 25/10/2025
+)
+_DATE_SEPARATORS = '-/'
+
+# Month-name date patterns, tried after the numeric layouts
+_MONTH_NAME_DATE_PATTERNS = tuple(re.compile(p) for p in [
+    r'(\d{1,2})\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+(\d{4})',  # 25 Oct 2025
+    r'(\d{1,2})[a-z]+\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*',  # 25th October (current year assumed)
+])
+
+def _separator_positions(text: str) -> List[int]:
+    """Sorted positions of every date separator in the text"""
+    positions = []
+    for separator in _DATE_SEPARATORS:
+        position = text.find(separator)
+        while position != -1:
+            positions.append(position)
+            position = text.find(separator, position + 1)
+    positions.sort()
+    return positions
+
+def _scan_numeric_date(text: str, separators: List[int], widths: Tuple[int, int, int]) -> Optional[Tuple[str, str, str]]:
+    """Find the leftmost run of three digit fields of the given widths joined by - or /"""
+    first, second, third = widths
+    length = len(text)
+    for sep1 in separators:
+        if sep1 < first:
+            continue
+        sep2 = sep1 + 1 + second
+        end = sep2 + 1 + third
+        if end > length or text[sep2] not in _DATE_SEPARATORS:
+            continue
+        fields = (text[sep1 - first:sep1], text[sep1 + 1:sep2], text[sep2 + 1:end])
+        # isdecimal is exactly what \d matches in a str pattern
+        if all(field.isdecimal() for field in fields):
+            return fields
+    return None
+
 class CSVProcessor:
     def __init__(self, data_dir: str = "data"):
         self.data_dir = data_dir
-        self.cache = {}
+        # Guards every cache below; background quick-query threads share this processor with the
+        # main thread, which may clear it at any time
+        self._lock = threading.RLock()
+        # Loaded days in least- to most-recently-used order, bounded by _CACHE_MAX_DAYS
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Per cached day: instrument -> (notional, quantity, avg, high, low, trades), computed once at load
+        self._stock_stats: Dict[str, Dict[str, tuple]] = {}
+        # Per cached day: the finished get_market_summary result
+        self._market_summaries: Dict[str, Dict[str, Any]] = {}
+        # Per cached day: (path, mtime) of the file it was read from, to spot files rewritten in place
+        self._loaded_files: Dict[str, Tuple[str, float]] = {}
+        # Bumped whenever the data files change so callers can invalidate derived caches
+        self.generation = 0
+        # Date -> CSV path index and its sorted dates, rebuilt only when the data directory's mtime changes
+        self._date_to_path: Dict[date, str] = {}
+        self._dates_cache = None
+        self._dates_mtime = None
         
         # Supported stock market suffixes
         self.supported_markets = {
@@ -55,33 +138,48 @@ class CSVProcessor:
             '.NASDAQ': 'United States (NASDAQ)',
             '.NYSE': 'United States (NYSE)'
         }
+        # One anchored alternation over every suffix, used to derive the Market column in a single pass
+        self._suffix_pattern = '(' + '|'.join(
+            re.escape(suffix) for suffix in sorted(self.supported_markets, key=len, reverse=True)
+        ) + ')$'
+        # Tickers repeat across rows and queries, so memoize the suffix lookup per upper-cased code
+        self._market_info = lru_cache(maxsize=8192)(self._lookup_market_info)
         
     def extract_date_from_filename(self, filename: str) -> Optional[date]:
         """Extract date from filename like ClientExecution_20251025.csv"""
+        # The date sits at a fixed offset in the template, so slice it out instead of searching
+        digits = filename[len(_FILENAME_PREFIX):-len(_FILENAME_SUFFIX)]
+        if len(digits) != 8 or not (digits.isascii() and digits.isdigit()):
+            return None
         try:
-            match = re.search(r'(\d{4})(\d{2})(\d{2})', filename)
-            if match:
-                year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
-                return date(year, month, day)
-        except Exception as e:
+            return date(int(digits[0:4]), int(digits[4:6]), int(digits[6:8]))
+        except ValueError as e:
             logger.error(f"Error extracting date from {filename}: {e}")
         return None
     
     def get_market_info(self, stock_code: str) -> Dict[str, str]:
         """Get market information for a stock code"""
-        for suffix, market_name in self.supported_markets.items():
-            if stock_code.upper().endswith(suffix):
-                return {
-                    'suffix': suffix,
-                    'market': market_name,
-                    'base_code': stock_code.upper().replace(suffix, '')
-                }
+        # Copied so callers can't alter the memoized entry
+        return dict(self._market_info(stock_code.upper()))
+    
+    def _lookup_market_info(self, code: str) -> Dict[str, str]:
+        """Resolve an upper-cased stock code's suffix, market and base code"""
+        # Every supported suffix is '.' plus letters, so the part after the last dot is the only candidate
+        _, dot, tail = code.rpartition('.')
+        suffix = dot + tail
+        market_name = self.supported_markets.get(suffix)
+        if market_name is not None:
+            return {
+                'suffix': suffix,
+                'market': market_name,
+                'base_code': code.replace(suffix, '')
+            }
         
         # If no known suffix found, assume it's a local market code
         return {
             'suffix': '',
             'market': 'Unknown Market',
-            'base_code': stock_code.upper()
+            'base_code': code
         }
     
     def is_valid_stock_code(self, stock_code: str) -> bool:
@@ -90,12 +188,12 @@ class CSVProcessor:
             return False
         
         # Check if it has any known market suffix
-        for suffix in self.supported_markets.keys():
-            if stock_code.upper().endswith(suffix):
-                return True
+        _, dot, tail = stock_code.upper().rpartition('.')
+        if dot + tail in self.supported_markets:
+            return True
         
         # Also allow numeric codes without suffixes (for flexibility)
-        if re.match(r'^\d+$', stock_code):
+        if _NUMERIC_ONLY_RE.match(stock_code):
             return True
             
         return False
@@ -104,67 +202,141 @@ class CSVProcessor:
         """Normalize stock code to uppercase"""
         return stock_code.upper()
     
-    def get_available_dates(self) -> List[date]:
-        """Get all available dates from CSV files"""
-        dates = []
-        if not os.path.exists(self.data_dir):
+    def clear_cache(self):
+        """Drop cached data after the CSV files have been (re)written"""
+        with self._lock:
+            self.cache.clear()
+            self._stock_stats.clear()
+            self._market_summaries.clear()
+            self._loaded_files.clear()
+            self._dates_cache = None
+            self.generation += 1
+    
+    def _evict_day(self, cache_key: str):
+        """Forget a loaded day and everything derived from it"""
+        self.cache.pop(cache_key, None)
+        self._stock_stats.pop(cache_key, None)
+        self._market_summaries.pop(cache_key, None)
+        self._loaded_files.pop(cache_key, None)
+    
+    def _drop_stale_days(self):
+        """Evict loaded days whose file was rewritten or removed since it was read"""
+        stale = []
+        for cache_key, (path, mtime) in self._loaded_files.items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    stale.append(cache_key)
+            except FileNotFoundError:
+                stale.append(cache_key)
+        
+        for cache_key in stale:
+            logger.info(f"Data for {cache_key} changed on disk, dropping the cached copy")
+            self._evict_day(cache_key)
+        if stale:
+            self.generation += 1
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Hit/miss counts and occupancy of the loaded-day cache"""
+        with self._lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self.cache),
+                'max_size': _CACHE_MAX_DAYS
+            }
+    
+    def _refresh_index(self) -> bool:
+        """Rescan the data directory into the date -> path index if its contents changed"""
+        try:
+            dir_mtime = os.stat(self.data_dir).st_mtime
+        except FileNotFoundError:
             logger.warning(f"Data directory {self.data_dir} does not exist")
-            return dates
-            
-        for filename in os.listdir(self.data_dir):
-            if filename.startswith("ClientExecution_") and filename.endswith(".csv"):
-                file_date = self.extract_date_from_filename(filename)
-                if file_date:
-                    dates.append(file_date)
+            self._date_to_path = {}
+            self._dates_cache = None
+            return False
+        
+        # Adding or removing a file bumps the directory's mtime, so an unchanged mtime means the same
+        # files; only the loaded days' own files need checking for in-place rewrites
+        if self._dates_cache is not None and dir_mtime == self._dates_mtime:
+            self._drop_stale_days()
+            return True
         
-        return sorted(dates)
+        had_index = self._dates_cache is not None
+        date_to_path = {}
+        with os.scandir(self.data_dir) as entries:
+            for entry in entries:
+                filename = entry.name
+                if filename.startswith(_FILENAME_PREFIX) and filename.endswith(_FILENAME_SUFFIX):
+                    file_date = self.extract_date_from_filename(filename)
+                    if file_date:
+                        date_to_path[file_date] = entry.path
+        
+        # A different set of files changes which dates have data, so answers keyed on generation are stale
+        if had_index and date_to_path != self._date_to_path:
+            self.generation += 1
+        self._date_to_path = date_to_path
+        self._dates_cache = sorted(date_to_path)
+        self._dates_mtime = dir_mtime
+        self._drop_stale_days()
+        return True
+    
+    def get_available_dates(self) -> List[date]:
+        """Get all available dates from CSV files"""
+        with self._lock:
+            if not self._refresh_index():
+                return []
+            return list(self._dates_cache)
     
     def parse_date_from_query(self, query: str) -> Optional[date]:
         """Extract date from natural language query"""
         query_lower = query.lower()
         
         # Today
-        if any(word in query_lower for word in ['today', 'current day', 'now']):
+        if _TODAY_RE.search(query_lower):
             return date.today()
         
+        # Day before yesterday, checked first since it contains "yesterday"
+        if _DAY_BEFORE_YESTERDAY_RE.search(query_lower):
+            return date.today() - timedelta(days=2)
+        
         # Yesterday
-        if any(word in query_lower for word in ['yesterday', 'previous day']):
+        if _YESTERDAY_RE.search(query_lower):
             return date.today() - timedelta(days=1)
         
-        # Day before yesterday
-        if any(word in query_lower for word in ['day before yesterday', '2 days ago']):
-            return date.today() - timedelta(days=2)
-        
         # This week
-        if any(word in query_lower for word in ['this week', 'current week']):
+        if _THIS_WEEK_RE.search(query_lower):
             return date.today()
         
         # Last week
-        if any(word in query_lower for word in ['last week', 'previous week']):
+        if _LAST_WEEK_RE.search(query_lower):
             return date.today() - timedelta(days=7)
         
-        # Specific date patterns
-        patterns = [
-            r'(\d{4})[-/](\d{2})[-/](\d{2})',  # 2025-10-25, 2025/10/25
-            r'(\d{2})[-/](\d{2})[-/](\d{4})',  # 25-10-2025, 25/10/2025
-            r'(\d{1,2})\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+(\d{4})',  # 25 Oct 2025
-            r'(\d{1,2})[a-z]+\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*',  # 25th October (current year assumed)
-        ]
-        
         month_map = {
             'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
             'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
         }
         
-        for pattern in patterns:
-            match = re.search(pattern, query_lower)
+        # Numeric dates are fixed-width, so check the fields around each separator directly
+        separators = _separator_positions(query_lower)
+        if len(separators) >= 2:
+            for i, widths in enumerate(_NUMERIC_DATE_WIDTHS):
+                fields = _scan_numeric_date(query_lower, separators, widths)
+                if fields:
+                    try:
+                        if i == 0:  # YYYY-MM-DD
+                            year, month, day = map(int, fields)
+                        else:  # DD-MM-YYYY
+                            day, month, year = map(int, fields)
+                        
+                        return date(year, month, day)
+                    except ValueError as e:
+                        logger.error(f"Error parsing date from query: {e}")
+        
+        for i, pattern in enumerate(_MONTH_NAME_DATE_PATTERNS):
+            match = pattern.search(query_lower)
             if match:
                 try:
-                    if pattern == patterns[0]:  # YYYY-MM-DD
-                        year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
-                    elif pattern == patterns[1]:  # DD-MM-YYYY
-                        day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
-                    elif pattern == patterns[2]:  # DD Month YYYY
+                    if i == 0:  # DD Month YYYY
                         day, month_str, year = int(match.group(1)), match.group(2).lower(), int(match.group(3))
                         month = month_map.get(month_str[:3], 1)
                     else:  # DD Month (current year)
@@ -182,48 +354,81 @@ class CSVProcessor:
     
     def load_csv_data(self, target_date: date) -> Optional[pd.DataFrame]:
         """Load CSV data for specific date"""
+        day = self._load_day(target_date)
+        return day[0] if day else None
+    
+    def _load_day(self, target_date: date) -> Optional[Tuple[pd.DataFrame, Dict[str, tuple]]]:
+        """A day's frame and per-stock figures, taken together so a concurrent clear can't split them"""
         cache_key = target_date.isoformat()
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
-        # Find matching CSV file
-        csv_files = []
-        for filename in os.listdir(self.data_dir):
-            if filename.startswith("ClientExecution_") and filename.endswith(".csv"):
-                file_date = self.extract_date_from_filename(filename)
-                if file_date == target_date:
-                    csv_files.append(filename)
-        
-        if not csv_files:
+        with self._lock:
+            if cache_key in self.cache:
+                self.cache_hits += 1
+                self.cache.move_to_end(cache_key)
+                return self.cache[cache_key], self._stock_stats[cache_key]
+            self.cache_misses += 1
+            
+            # Find the matching CSV file
+            self._refresh_index()
+            filepath = self._date_to_path.get(target_date)
+            generation = self.generation
+        
+        if filepath is None:
             logger.warning(f"No CSV file found for date {target_date}")
             return None
         
-        # Load the first matching file
-        filepath = os.path.join(self.data_dir, csv_files[0])
+        # Parse outside the lock so other days' cached lookups aren't held up behind the file read
         try:
-            df = pd.read_csv(filepath, delimiter=';')
+            # Taken before reading, so a rewrite that races the read is still noticed later
+            file_mtime = os.stat(filepath).st_mtime
+            df = pd.read_csv(filepath, delimiter=';', usecols=_CSV_COLUMNS, dtype=_CSV_DTYPES, engine='c')
             
-            # Normalize Instrument column to uppercase
+            # Normalize Instrument column to uppercase, stored as a categorical so
+            # comparisons and groupbys work on integer codes instead of strings
             if 'Instrument' in df.columns:
-                df['Instrument'] = df['Instrument'].str.upper()
+                df['Instrument'] = df['Instrument'].str.upper().astype('category')
             
-            # Calculate notional amount (Quantity * Price)
-            if 'Quantity' in df.columns and 'Price' in df.columns:
-                df['Notional'] = df['Quantity'] * df['Price']
+            # Whole-share files (the normal case) go back to int64 so volumes still print as integers
+            quantity = df['Quantity']
+            if quantity.notna().all() and (quantity % 1 == 0).all():
+                df['Quantity'] = quantity.astype('int64')
             
             # Add market information
-            df['Market'] = df['Instrument'].apply(
-                lambda x: self.get_market_info(x)['market']
-            )
+            suffixes = df['Instrument'].str.extract(self._suffix_pattern, expand=False)
+            # Categorical, so the market summary can bin rows by integer market codes
+            df['Market'] = suffixes.map(self.supported_markets).fillna('Unknown Market').astype('category')
             
-            # Cache the result
-            self.cache[cache_key] = df
-            logger.info(f"Loaded data from {filepath} with {len(df)} records")
-            return df
+            stock_stats = self._aggregate_stocks(df)
             
         except Exception as e:
             logger.error(f"Error loading CSV file {filepath}: {e}")
             return None
+        
+        # Cache the result, unless the data was cleared or changed while it was being read
+        with self._lock:
+            if self.generation == generation:
+                self._stock_stats[cache_key] = stock_stats
+                self._loaded_files[cache_key] = (filepath, file_mtime)
+                self.cache[cache_key] = df
+                while len(self.cache) > _CACHE_MAX_DAYS:
+                    self._evict_day(next(iter(self.cache)))
+        logger.info(f"Loaded data from {filepath} with {len(df)} records")
+        return df, stock_stats
+    
+    def _aggregate_stocks(self, df: pd.DataFrame) -> Dict[str, tuple]:
+        """Per-instrument totals and price stats for one day's trades"""
+        instruments = df['Instrument']
+        agg = df.groupby(instruments, sort=False, observed=True).agg(
+            quantity=('Quantity', 'sum'),
+            average_price=('Price', 'mean'),
+            high_price=('Price', 'max'),
+            low_price=('Price', 'min'),
+            trade_count=('Price', 'size')
+        )
+        # Notional (Quantity * Price) is only needed for this sum, so it's grouped as a bare
+        # array-backed Series rather than added to (and copying) the cached frame
+        notional = pd.Series(df['Quantity'].to_numpy() * df['Price'].to_numpy(), index=df.index)
+        agg.insert(0, 'notional', notional.groupby(instruments, sort=False, observed=True).sum())
+        return dict(zip(agg.index, zip(*(agg[column].to_numpy() for column in agg.columns))))
     
     def get_stock_notional(self, stock_code: str, query_date: date = None) -> Dict[str, Any]:
         """Get notional amount for a specific stock on a specific date"""
@@ -236,8 +441,8 @@ class CSVProcessor:
         # Get market info
         market_info = self.get_market_info(normalized_code)
         
-        df = self.load_csv_data(query_date)
-        if df is None or df.empty:
+        day = self._load_day(query_date)
+        if day is None or day[0].empty:
             return {
                 'success': False,
                 'notional': 0,
@@ -248,10 +453,10 @@ class CSVProcessor:
                 'normalized_code': normalized_code
             }
         
-        # Filter for the specific stock
-        stock_data = df[df['Instrument'] == normalized_code]
+        # Look up the stock's precomputed figures
+        stats = day[1].get(normalized_code)
         
-        if stock_data.empty:
+        if stats is None:
             return {
                 'success': False,
                 'notional': 0,
@@ -262,14 +467,8 @@ class CSVProcessor:
                 'normalized_code': normalized_code
             }
         
-        total_notional = stock_data['Notional'].sum()
-        total_quantity = stock_data['Quantity'].sum()
-        avg_price = stock_data['Price'].mean()
-        trade_count = len(stock_data)
-        
-        # Calculate additional statistics
-        high_price = stock_data['Price'].max()
-        low_price = stock_data['Price'].min()
+        total_notional, total_quantity, avg_price, high_price, low_price, trade_count = stats
+        trade_count = int(trade_count)
         price_volatility = high_price - low_price
         
         return {
@@ -313,6 +512,11 @@ class CSVProcessor:
         if query_date is None:
             query_date = date.today()
         
+        cache_key = query_date.isoformat()
+        with self._lock:
+            if cache_key in self._market_summaries:
+                return self._market_summaries[cache_key]
+        
         df = self.load_csv_data(query_date)
         if df is None or df.empty:
             return {
@@ -321,20 +525,40 @@ class CSVProcessor:
                 'date': query_date
             }
         
-        market_summary = df.groupby('Market').agg({
-            'Notional': 'sum',
-            'Quantity': 'sum',
-            'Instrument': 'nunique',
-            'Price': ['mean', 'count']
+        # Bin every row by its market code: one bincount per total instead of a hash groupby
+        markets = df['Market'].cat
+        market_ids = markets.codes.to_numpy()
+        n_markets = len(markets.categories)
+        quantity = df['Quantity'].to_numpy()
+        price = df['Price'].to_numpy()
+        
+        # Blank cells are NaN; leave them out of the sums and the trade count, as pandas' groupby does
+        priced = ~np.isnan(price)
+        rows = np.bincount(market_ids, minlength=n_markets)
+        trades = np.bincount(market_ids[priced], minlength=n_markets)
+        total_notional = np.bincount(market_ids, weights=np.nan_to_num(quantity * price), minlength=n_markets)
+        total_quantity = np.bincount(market_ids, weights=np.nan_to_num(quantity), minlength=n_markets)
+        if quantity.dtype.kind == 'i':
+            # Exact in float64 for any realistic share count, so the cast back loses nothing
+            total_quantity = total_quantity.astype(np.int64)
+        price_sum = np.bincount(market_ids, weights=np.nan_to_num(price), minlength=n_markets)
+        # Each instrument belongs to exactly one market, so count each instrument's first row
+        _, first_rows = np.unique(df['Instrument'].cat.codes.to_numpy(), return_index=True)
+        unique_stocks = np.bincount(market_ids[first_rows], minlength=n_markets)
+        
+        traded = rows > 0
+        market_summary = pd.DataFrame({
+            'Market': markets.categories[traded],
+            'Total_Notional': total_notional[traded],
+            'Total_Quantity': total_quantity[traded],
+            'Unique_Stocks': unique_stocks[traded],
+            'Avg_Price': np.divide(price_sum[traded], trades[traded], out=np.full(traded.sum(), np.nan), where=trades[traded] > 0),
+            'Total_Trades': trades[traded]
         }).round(2)
         
-        # Flatten column names
-        market_summary.columns = ['Total_Notional', 'Total_Quantity', 'Unique_Stocks', 'Avg_Price', 'Total_Trades']
-        market_summary = market_summary.reset_index()
-        
         total_market_notional = market_summary['Total_Notional'].sum()
         
-        return {
+        summary = {
             'success': True,
             'date': query_date,
             'total_markets': len(market_summary),
@@ -342,32 +566,42 @@ class CSVProcessor:
             'market_breakdown': market_summary.to_dict('records'),
             'message': f"Trading summary for {query_date}: {len(market_summary)} markets, total notional {total_market_notional:,.0f}"
         }
+        # Only keep it while the frame it was built from is still the cached one
+        with self._lock:
+            if self.cache.get(cache_key) is df:
+                self._market_summaries[cache_key] = summary
+        return summary
     
     def get_stocks_by_market(self, market_suffix: str, query_date: date = None) -> List[Dict[str, Any]]:
         """Get all stocks for a specific market on a given date"""
         if query_date is None:
             query_date = date.today()
         
-        df = self.load_csv_data(query_date)
-        if df is None or df.empty:
+        return self.get_stocks_by_markets((market_suffix,), query_date)
+    
+    def get_stocks_by_markets(self, market_suffixes: Tuple[str, ...], query_date: date = None) -> List[Dict[str, Any]]:
+        """Get all stocks for several market suffixes on a given date in a single pass"""
+        if query_date is None:
+            query_date = date.today()
+        
+        day = self._load_day(query_date)
+        if day is None or day[0].empty:
             return []
         
-        # Filter stocks by market suffix
+        # Filter the day's precomputed per-stock figures by suffix
+        suffixes = tuple(suffix.upper() for suffix in market_suffixes)
         market_stocks = []
-        for instrument in df['Instrument'].unique():
-            if instrument.upper().endswith(market_suffix.upper()):
-                stock_data = df[df['Instrument'] == instrument]
-                market_info = self.get_market_info(instrument)
-                
-                stock_summary = {
+        for instrument, stats in day[1].items():
+            if instrument.endswith(suffixes):
+                total_notional, total_quantity, avg_price, _, _, trade_count = stats
+                market_stocks.append({
                     'code': instrument,
-                    'market': market_info['market'],
-                    'total_notional': stock_data['Notional'].sum(),
-                    'total_quantity': stock_data['Quantity'].sum(),
-                    'average_price': stock_data['Price'].mean(),
-                    'trade_count': len(stock_data)
-                }
-                market_stocks.append(stock_summary)
+                    'market': self.get_market_info(instrument)['market'],
+                    'total_notional': total_notional,
+                    'total_quantity': total_quantity,
+                    'average_price': avg_price,
+                    'trade_count': int(trade_count)
+                })
         
         return sorted(market_stocks, key=lambda x: x['total_notional'], reverse=True)
 